@@ -1,9 +1,14 @@
 """Module that includes everything used for communication with the cluster"""
 import os
 import shutil
+import asyncio
+import subprocess
 
 from icepolcka_utils import utils
 
+# Maximum number of sbatch calls that are sent to the Slurm controller at the same time
+MAX_SUBMISSIONS = 8
+
 
 class SlurmJob:
     """Slurm job handler
@@ -165,3 +170,45 @@ class SlurmJob:
             job_name = job_name + "_MP" + str(cfg['mp'])
         job_name = job_name + "_" + start_str + "_TO_" + end_str
         return job_name
+
+
+def submit_jobs(job_args, max_concurrent=MAX_SUBMISSIONS):
+    """Send jobs to the cluster
+
+    Sends multiple jobs to the cluster. Each sbatch call waits for the response of the Slurm
+    controller, the calls are therefore done concurrently. The number of calls running at the same
+    time is limited, so that the Slurm controller is not flooded with requests.
+
+    :param job_args: List of sbatch arguments for each job. The arguments of a job are given as a
+        list (e.g., ["--array=0-9", batch_path]).
+    :type job_args: list
+    :param max_concurrent: Maximum number of sbatch calls running at the same time.
+    :type max_concurrent: int
+
+    Raises:
+        RuntimeError: If any of the sbatch calls fails. All other jobs are still submitted, the
+            error message gives the number of submitted and failed jobs and lists the arguments
+            of the failed jobs.
+
+    """
+    async def _submit():
+        semaphore = asyncio.Semaphore(max_concurrent)
+        return await asyncio.gather(*(_sbatch(args, semaphore) for args in job_args),
+                                    return_exceptions=True)
+    results = asyncio.run(_submit())
+    failed = [(args, result) for args, result in zip(job_args, results)
+              if isinstance(result, Exception)]
+    if failed:
+        failed_jobs = ", ".join(" ".join(args) for args, _ in failed)
+        raise RuntimeError(str(len(job_args) - len(failed)) + " of " + str(len(job_args))
+                           + " jobs submitted, sbatch failed for " + str(len(failed)) + ": "
+                           + failed_jobs) from failed[0][1]
+
+
+async def _sbatch(args, semaphore):
+    cmd = ["sbatch", *args]
+    async with semaphore:
+        proc = await asyncio.create_subprocess_exec(*cmd)
+        return_code = await proc.wait()
+    if return_code != 0:
+        raise subprocess.CalledProcessError(return_code, cmd)
@@ -142,6 +142,27 @@ def load_wrf_data(data_file):
     return df_wrf
 
 
+def load_wrf_grid(data_file):
+    """Load wrf grid coordinates
+
+    Only the surface longitudes and latitudes of the first time step are read from the file. This
+    avoids loading the full wrf dataset when only the grid geometry is needed.
+
+    :param data_file: Path to the data file.
+    :type data_file: str
+
+    Returns:
+        (numpy.ndarray, numpy.ndarray):
+            1) Longitudes of the grid.
+            2) Latitudes of the grid.
+
+    """
+    with netCDF4.Dataset(data_file) as nc_data:
+        lons = np.asarray(nc_data.variables['XLONG'][0])
+        lats = np.asarray(nc_data.variables['XLAT'][0])
+    return lons, lats
+
+
 def load_xarray(data_file):
     """Loads data into a xarray
 
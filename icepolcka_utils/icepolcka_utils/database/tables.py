@@ -247,9 +247,7 @@ def create_session(db_path):
 
     """
     if not os.path.exists(db_path):
-        folder_split = db_path.split(os.sep)[:-1]
-        folder = os.sep.join(folder_split)
-        utils.make_folder(folder)
+        utils.make_folder(os.path.dirname(db_path))
     engine = create_engine("sqlite:///" + db_path)
     Base.metadata.bind = engine
     Base.metadata.create_all(engine)
@@ -39,7 +39,7 @@ def get_bin_altitude(r_coord, theta, site_alt=0, r_e=6371000, k=4/3):
     return height
 
 
-def get_bin_distance(r_coord, theta, site_alt=0, r_e=6371000, k=4/3):
+def get_bin_distance(r_coord, theta, site_alt=0, r_e=6371000, k=4/3, height=None):
     """Calculates the distance between range bin and site
 
     Calculates the great circle distance while taking the refractivity of the atmosphere into
@@ -62,13 +62,16 @@ def get_bin_distance(r_coord, theta, site_alt=0, r_e=6371000, k=4/3):
         k (float): Adjustment factor to account for the refractivity gradient that affects radar
             beam propagation. In principle this is wavelength-dependent. The default of 4/3 is a
             good approximation for most weather radar wavelengths.
+        height (numpy.ndarray or float): Bin altitudes [m] as returned by :func:`get_bin_altitude`
+            for the same input. If None, they will be calculated.
 
     Returns:
         numpy.ndarray or float:
             Array of great circle arc distances [m].
 
     """
-    height = get_bin_altitude(r_coord, theta, site_alt, r_e, k)
+    if height is None:
+        height = get_bin_altitude(r_coord, theta, site_alt, r_e, k)
     s_arc = k*r_e*np.arcsin((r_coord*np.cos(np.radians(theta)))/(k*r_e + height))
     return s_arc
 
@@ -104,25 +107,29 @@ def get_pos_from_dist(site_location, distance, azimuth, r_e=6371000):
 def get_target_distance(radar, target, r_e=6371000):
     """Calculates the distance of a target from the radar.
 
+    The target coordinates may also be numpy arrays, then the distances of all targets are
+    calculated at once.
+
     Args:
         radar (tuple or list): Longitude, Latitude of the radar. Must be given in decimal degrees.
         target (tuple or list): Longitude, Latitude of the target. Must be given in decimal degrees.
+            Longitude and Latitude can be numpy arrays of the same shape.
         r_e (float): Earth's radius [m].
 
     Returns:
-        float:
+        float or numpy.ndarray:
             The distance in meters.
 
     """
-    lon_radar = math.radians(radar[0])
-    lat_radar = math.radians(radar[1])
-    lon_target = math.radians(target[0])
-    lat_target = math.radians(target[1])
+    lon_radar = np.radians(radar[0])
+    lat_radar = np.radians(radar[1])
+    lon_target = np.radians(target[0])
+    lat_target = np.radians(target[1])
 
     d_lat = lat_target-lat_radar
     d_lon = lon_target-lon_radar
 
-    a_var = math.sin(d_lat/2) * math.sin(d_lat/2) \
-        + math.sin(d_lon/2) * math.sin(d_lon/2) * math.cos(lat_radar) * math.cos(lat_target)
-    c_fac = 2 * math.atan2(math.sqrt(a_var), math.sqrt(1-a_var))
+    a_var = np.sin(d_lat/2) * np.sin(d_lat/2) \
+        + np.sin(d_lon/2) * np.sin(d_lon/2) * np.cos(lat_radar) * np.cos(lat_target)
+    c_fac = 2 * np.arctan2(np.sqrt(a_var), np.sqrt(1-a_var))
     return r_e * c_fac
@@ -9,7 +9,6 @@ function and classes related to PyArtGrid calculations and transformations.
 import datetime as dt
 
 import pyart
-import pytz
 import numpy as np
 
 from tint import grid_utils
@@ -95,7 +94,7 @@ class PyArtGrid(pyart.core.grid.Grid):
 
         """
         time = dt.datetime.utcfromtimestamp(self.time['data'][0])
-        time = time.replace(tzinfo=pytz.utc)
+        time = time.replace(tzinfo=dt.timezone.utc)
         return time
 
     def get_grid_alt(self, alt_meters):
@@ -160,7 +159,7 @@ def get_pyart_grid(grid_ds, mask=None, var="Zhh_corr"):
     if mask is None:
         mask = np.ones(grid_ds[var].shape)
     time = dt.datetime.strptime(str(grid_ds.attrs['time']),
-                                "%Y-%m-%d %H:%M:%S").replace(tzinfo=pytz.utc)
+                                "%Y-%m-%d %H:%M:%S").replace(tzinfo=dt.timezone.utc)
     x_grid = np.arange(0, 360 * 400, 400)
     y_grid = np.arange(0, 360 * 400, 400)
     z_grid = np.arange(grid_ds.z_min, grid_ds.z_max + grid_ds.vert_res, grid_ds.vert_res)
@@ -2,7 +2,6 @@
 import os
 import datetime as dt
 
-import pytz
 import numpy as np
 
 from icepolcka_utils.database import algorithms, interpolations, main, models
@@ -236,7 +235,7 @@ class HMCStats(Stats):
         hmc_time = self.hmc_handles[i]['time'].replace(second=0)
         rg_time = self.rg_handles[i]['time'].replace(second=0)
         assert hmc_time == rg_time, "Hmc time does not fit to RG time"
-        return self.rg_handles[i]['time'].replace(tzinfo=pytz.UTC)
+        return self.rg_handles[i]['time'].replace(tzinfo=dt.timezone.utc)
 
 
 class DolanStats(HMCStats):
@@ -56,17 +56,19 @@ def spherical_to_cart(r_coord, azi, elv, site_coords):
     else:
         raise ValueError("Site coordinates not in correct shape")
 
-    dist = get_bin_distance(r_coord, elv, site_alt)
-
     proj = _proj4_to_osr(
         ("+proj=aeqd +lon_0={lon:f} +x_0=0 +y_0=0 " + "+lat_0={lat:f} +ellps=WGS84 +datum=WGS84 " +
          "+units=m +no_defs").format(lon=site_coords[0], lat=site_coords[1])
         )
-    x_grid = dist*np.cos(np.radians(90 - azi))
-    y_grid = dist*np.sin(np.radians(90 - azi))
-    z_grid = get_bin_altitude(r_coord, elv, site_alt)
-    xyz = np.concatenate((x_grid[..., np.newaxis], y_grid[..., np.newaxis],
-                          z_grid[..., np.newaxis]), axis=-1)
+
+    # The coordinates are written directly into the output array, the bin altitude is needed for
+    # the distance as well and is only calculated once
+    xyz = np.empty(r_coord.shape + (3,))
+    xyz[..., 2] = get_bin_altitude(r_coord, elv, site_alt)
+    dist = get_bin_distance(r_coord, elv, site_alt, height=xyz[..., 2])
+    azi_rad = np.radians(90 - azi)
+    xyz[..., 0] = dist*np.cos(azi_rad)
+    xyz[..., 1] = dist*np.sin(azi_rad)
     return xyz, proj
 
 
@@ -282,12 +282,9 @@ def get_diameters():
 
     """
     mass = 1000*4/3*np.pi*(2*10**(-6))**3  # Mass of 2µm water droplet
-    bins = []
     rho = 1000
-    for _ in range(33):
-        bins.append(((3*mass)/(4*rho*np.pi))**(1/3) * 2)
-        mass = 2*mass
+    masses = mass * 2.0**np.arange(33)  # Each bin doubles the mass of the previous one
+    bins = ((3*masses)/(4*rho*np.pi))**(1/3) * 2
     # Append 9000 µm, because that is the maximum considered in CR-SIM.
     # Not available in SBM. Bulk parameterizations are in principle unlimited.
-    bins = bins + [0.009]
-    return np.array(bins)
+    return np.append(bins, 0.009)
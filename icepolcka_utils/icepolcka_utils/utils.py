@@ -38,8 +38,11 @@ class Config:
 
     @staticmethod
     def _open_config_file(config_file):
+        # The C implementation of the loader is much faster, but only available if PyYAML was built
+        # with libyaml
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
         with open(config_file, encoding="utf-8") as cfg_file:
-            cfg = yaml.load(cfg_file, Loader=yaml.SafeLoader)
+            cfg = yaml.load(cfg_file, Loader=loader)
         # Transform any existing string time entries to datetime for later processing
         try:
             cfg['start'] = dt.datetime.strptime(cfg['start'], "%d.%m.%Y %H:%M:%S")
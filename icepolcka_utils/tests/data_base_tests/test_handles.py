@@ -2,6 +2,7 @@
 import os
 import unittest
 
+import numpy as np
 import xarray as xr
 
 from icepolcka_utils.database import handles
@@ -20,6 +21,15 @@ class HandlesTest(unittest.TestCase):
         dataset = handles.load_wrf_data(self.wrf_file)
         self.assertTrue(isinstance(dataset, xr.Dataset), "Expected xarray Dataset")
 
+    def test_load_wrf_grid_returns_matching_coordinates(self):
+        """Test if the lon/lat arrays are the surface coordinates of the first time step"""
+        lons, lats = handles.load_wrf_grid(self.wrf_file)
+        self.assertEqual(lons.shape, lats.shape, "Expected equal shape of lon/lat")
+        self.assertEqual(lons.ndim, 2, "Expected 2-D grid")
+        dataset = handles.load_wrf_data(self.wrf_file)
+        np.testing.assert_array_equal(lons, dataset['XLONG'][0])
+        np.testing.assert_array_equal(lats, dataset['XLAT'][0])
+
     def test_load_xarray_loads_the_data(self):
         """Test if the data is loaded to xarray"""
         dataset = handles.load_xarray(self.crsim_file)
@@ -1,6 +1,9 @@
 """Tests for the cluster module"""
+import asyncio
 import os
+import subprocess
 import unittest
+from unittest import mock
 
 from tests import utils as test_utils
 
@@ -50,5 +53,54 @@ class SlurmJobTest(unittest.TestCase):
         return cfg
 
 
+class SubmitJobsTest(unittest.TestCase):
+    """Tests for the submit_jobs function"""
+    @staticmethod
+    def _mock_exec(return_code):
+        proc = mock.Mock()
+        proc.wait = mock.AsyncMock(return_value=return_code)
+        return mock.AsyncMock(return_value=proc)
+
+    def test_submit_jobs_calls_sbatch_for_each_job(self):
+        """Test if sbatch is called once for each job with the given arguments"""
+        exec_mock = self._mock_exec(0)
+        with mock.patch("asyncio.create_subprocess_exec", exec_mock):
+            cluster.submit_jobs([["a"], ["--array=0-1", "b"]])
+        calls = sorted(call.args for call in exec_mock.call_args_list)
+        self.assertEqual(calls, [("sbatch", "--array=0-1", "b"), ("sbatch", "a")])
+
+    def test_submit_jobs_reports_failed_jobs(self):
+        """Test if only the failed jobs are listed in the raised error"""
+        def _exec(*cmd):
+            proc = mock.Mock()
+            proc.wait = mock.AsyncMock(return_value=int(cmd[-1] == "bad"))
+            return proc
+        with mock.patch("asyncio.create_subprocess_exec", mock.AsyncMock(side_effect=_exec)):
+            with self.assertRaises(RuntimeError) as context:
+                cluster.submit_jobs([["good"], ["bad"]])
+        self.assertIn("1 of 2 jobs submitted", str(context.exception))
+        self.assertIn("bad", str(context.exception))
+        self.assertNotIn("good", str(context.exception))
+        self.assertIsInstance(context.exception.__cause__, subprocess.CalledProcessError)
+
+    def test_submit_jobs_limits_concurrent_calls(self):
+        """Test if not more than max_concurrent sbatch calls run at the same time"""
+        running = []
+        max_running = []
+
+        async def _wait():
+            running.append(1)
+            max_running.append(len(running))
+            await asyncio.sleep(0)
+            running.pop()
+            return 0
+
+        proc = mock.Mock()
+        proc.wait = _wait
+        with mock.patch("asyncio.create_subprocess_exec", mock.AsyncMock(return_value=proc)):
+            cluster.submit_jobs([[str(i)] for i in range(10)], max_concurrent=3)
+        self.assertEqual(max(max_running), 3)
+
+
 if __name__ == "__main__":
     unittest.main()
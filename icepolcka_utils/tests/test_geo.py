@@ -1,5 +1,6 @@
 """Tests for geo module"""
 import unittest
+import numpy as np
 from icepolcka_utils import geo
 
 
@@ -30,6 +31,17 @@ class GeoTest(unittest.TestCase):
         exp_s = 9845  # Calculated by hand
         self.assertAlmostEqual(s_arc, exp_s, places=0)
 
+    def test_get_bin_distance_uses_given_height(self):
+        """Tests if the given bin altitude is used instead of the calculated one"""
+        height = geo.get_bin_altitude(10000, 10, site_alt=500)
+        s_arc = geo.get_bin_distance(10000, 10, site_alt=500, height=height)
+        self.assertEqual(s_arc, geo.get_bin_distance(10000, 10, site_alt=500))
+        r_e = 6371000*4/3
+        exp_arc = r_e*np.arcsin(10000*np.cos(np.radians(10))/(r_e + height + 1000))
+        s_arc = geo.get_bin_distance(10000, 10, site_alt=500, height=height + 1000)
+        self.assertNotAlmostEqual(s_arc, geo.get_bin_distance(10000, 10, site_alt=500))
+        self.assertAlmostEqual(s_arc, exp_arc)
+
     def test_get_target_distance_calculates_distance_correctly(self):
         """Tests if the calculated distance between Mira-35 and Poldirad is correct"""
         origin = (11.573550, 48.148021)  # Mira-35
@@ -37,6 +49,15 @@ class GeoTest(unittest.TestCase):
         dist = geo.get_target_distance(origin, target) / 1000
         self.assertAlmostEqual(dist, 22.9, places=1)  # Tested with Google Maps
 
+    def test_get_target_distance_works_with_arrays(self):
+        """Tests if the distances of several targets are calculated at once"""
+        origin = (11.573550, 48.148021)  # Mira-35
+        lons = np.array([11.278901, 11.573550])
+        lats = np.array([48.086721, 48.148021])
+        dist = geo.get_target_distance(origin, (lons, lats))
+        exp_dist = [geo.get_target_distance(origin, (lon, lat)) for lon, lat in zip(lons, lats)]
+        np.testing.assert_allclose(dist, exp_dist)
+
     def test_get_pos_from_dist_calculates_position_correctly_towards_north(self):
         """Tests if the calculated position is correct when pointing north"""
         site = (11.5661, 48.1524)
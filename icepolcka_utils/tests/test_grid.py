@@ -3,7 +3,6 @@ import os
 import unittest
 import datetime as dt
 
-import pytz
 import numpy as np
 
 from tests import utils as test_utils
@@ -42,7 +41,7 @@ class PyArtGridTest(unittest.TestCase):
     def setUp(self):
         self.data, self.data_masked = self._make_data()
         time = dt.datetime.utcnow()
-        self.time = time.replace(tzinfo=pytz.utc).replace(microsecond=0)
+        self.time = time.replace(tzinfo=dt.timezone.utc).replace(microsecond=0)
         self.grid = test_utils.make_pyart_grid(self.data_masked, self.time)
         self.params = {'FIELD_THRESH': 32, 'MIN_SIZE': 3, 'GS_ALT': 1500}
 
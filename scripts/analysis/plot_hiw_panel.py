@@ -117,6 +117,7 @@ def _plot_panel(thresh_dict, hm_name):
     handles, _ = _create_legend(axs)
     fig.legend(handles=handles, loc=(0.25, 0.91), ncol=3)
     plt.savefig(hm_name + ".png", bbox_inches="tight")
+    plt.close()
 
 
 def _load_stats(stats_class, cfg, height):
@@ -57,7 +57,7 @@ def _main(cfg_file):
         data_new = data.load()
         data.close()
         for var in variables:
-            data_new[var].values = np.where(~mask, data_new[var].values, np.nan)
+            np.copyto(data_new[var].values, np.nan, where=mask)
         time_str = str(dt.datetime.strptime(str(data_new.time), "%Y-%m-%d %H:%M:%S"))
         data_new.attrs['time'] = time_str
         if cfg['source'] == "DWD":
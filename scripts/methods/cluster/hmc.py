@@ -74,9 +74,8 @@ def _get_dolan(df_data, temp_df):
                                     use_temp=True, band="C", return_scores=True, T=temp)
     fh_max = np.argmax(scores, axis=0) + 1
     fh_min = np.argmin(scores, axis=0) + 1
-    mask_idx = np.where(fh_max == fh_min)
-    fh_score = fh_max.copy().astype(float)
-    fh_score[mask_idx] = np.nan
+    fh_score = fh_max.astype(float)
+    fh_score[fh_max == fh_min] = np.nan
     return fh_score
 
 
@@ -73,8 +73,8 @@ def _interpolate(wrf_data, rg_data, crsim_data):
 
 
 def _save(temp, time, mp_id, mask, output):
-    temp_masked = np.where(~mask, temp, np.nan)
-    data_dict = {"temperature": (["height", "y", "x"], temp_masked)}
+    np.copyto(temp, np.nan, where=mask)
+    data_dict = {"temperature": (["height", "y", "x"], temp)}
     dataset = xr.Dataset(data_dict)
     dataset['time'] = time
     dataset.attrs['MP_PHYSICS'] = mp_id
@@ -9,12 +9,9 @@ variable separately.
 
 """
 import os
-import shutil
 import subprocess
 import datetime as dt
 
-VARIABLES = ["Zhh", "Zdr", "LDRh", "RHOhv", "Kdp", "Ah", "Adp"]
-
 
 def _get_files(idx):
     """Get the CR-SIM filename
@@ -41,11 +38,27 @@ def _get_files(idx):
     return names[idx].strip(), time
 
 
+def _get_variables():
+    """Get the variable names
+
+    The variables that are processed are defined by the script that sends the job. They are listed
+    in a file within the working directory, one variable per line.
+
+    Returns:
+        list:
+            Names of the variables to be processed.
+
+    """
+    with open("variables.txt", "r", encoding="utf-8") as file_handle:
+        variables = [line.strip() for line in file_handle]
+    return variables
+
+
 def _prep_folder(workdir, idx, var):
     """Prepare job folder
 
-    Prepares the job folder by making the subdirectories (if they don't exist) and copying the radar
-    filter code and the parameter file to the directory.
+    Prepares the job folder by making the subdirectories (if they don't exist) and linking the radar
+    filter code to the directory. The parameter file is written by :func:`_set_params`.
 
     Args:
         workdir (str): Path to working directory.
@@ -59,41 +72,62 @@ def _prep_folder(workdir, idx, var):
     """
     sub_folder = workdir + os.sep + str(idx) + os.sep + var + os.sep
     rf_folder = workdir + os.sep + "radar_filter"
-    param_file = workdir + os.sep + "RF_PARAMETERS"
     try:
         os.makedirs(sub_folder)
     except FileExistsError:
         pass
     for file_name in os.listdir(rf_folder):
-        shutil.copy(rf_folder + os.sep + file_name, sub_folder)
-    shutil.copy(param_file, sub_folder)
+        if file_name == "RF_PARAMETERS" or os.path.lexists(sub_folder + file_name):
+            continue
+        os.symlink(os.path.realpath(rf_folder + os.sep + file_name), sub_folder + file_name)
     return sub_folder
 
 
-def _set_params(sub_folder, date, crsim_file, var):
+def _read_params(workdir):
+    """Read parameter file
+
+    Reads the parameter file of the working directory. It is the template for the parameter files
+    of all variables and is therefore only read once.
+
+    Args:
+        workdir (str): Path to working directory.
+
+    Returns:
+        list:
+            Lines of the parameter file.
+
+    """
+    with open(workdir + os.sep + "RF_PARAMETERS", "r", encoding="utf-8") as f_in:
+        params = f_in.readlines()
+    return params
+
+
+def _set_params(sub_folder, params, date, crsim_file, var):
     """Create parameter file
 
     The radar filter script needs a parameter file, where some configurations are given. The
     configurations include: Input/output file, variable name, maximum radar range minimum and
     maximum azimuth angle, elevation angles.
 
-    This function sets these settings by writing to the Parameter file within the job directory.
+    This function sets these settings by writing the Parameter file to the job directory, using the
+    parameters of the working directory as a template.
 
     Args:
         sub_folder (str): Path to sub folder of working directory for this job.
+        params (list): Lines of the parameter file of the working directory.
         date (datetime.datetime): Time step [UTC] of CR-SIM file.
         crsim_file (str): Path to input CR-SIM file.
         var (str): Name of variable.
 
+    Returns:
+        bool:
+            False if the output file exists already and the radar filter doesn't need to run.
+
     """
     param_file = sub_folder + os.sep + "RF_PARAMETERS"
     str_time = dt.datetime.strftime(date, "%H%M%S")
-
-    # Open the parameter file and write the simulation specific configs
-    with open(param_file, "r", encoding="utf-8") as f_in:
-        params = f_in.readlines()
     output = params[14].strip()[1:-1] + str(date.year) + os.sep \
-        + f"{date.month:02d}" + os.sep + f"{date.day:02d}" + os.sep \
+        + f"{date.month:02d}" + os.sep + f"{date.day:02d}" + os.sep
 
     # Check if output exists already
     try:
@@ -103,13 +137,16 @@ def _set_params(sub_folder, date, crsim_file, var):
 
     output_file = output + os.sep + str_time + "_" + var + ".nc"
     if os.path.exists(output_file):
-        return
+        return False
 
+    # Write the simulation specific configs
+    params = list(params)
     params[2] = "'" + crsim_file + "'" + "\n"
     params[4] = "'" + var + "'" + "\n"
     params[14] = "'" + output_file + "'" + "\n"
     with open(param_file, "w", encoding="utf-8") as f_out:
         f_out.writelines(params)
+    return True
 
 
 def _main():
@@ -117,11 +154,14 @@ def _main():
     idx = int(os.environ['SLURM_ARRAY_TASK_ID'])
     filename, filetime = _get_files(idx)
     workdir = os.getcwd()
+    params = _read_params(workdir)
+    variables = _get_variables()
     print("Execute RF for all variables")
-    for var in VARIABLES:
+    for var in variables:
         print(var)
         sub_folder = _prep_folder(workdir, idx, var)
-        _set_params(sub_folder, filetime, filename, var)
+        if not _set_params(sub_folder, params, filetime, filename, var):
+            continue
         os.chdir(sub_folder)
         subprocess.run(["./radar_filter"], check=True)
 
@@ -11,9 +11,13 @@ and corresponding time stamps that are to be processed by this script. A third t
 contains the file path to a WRF data file that contains the lon/lat grid. And a configuration yaml
 file.
 
+The projected target grid is cached in the rg working directory (trg_cart_<hash>.npy) and shared by
+all jobs. The cache files are not removed automatically, stale ones have to be deleted by hand.
 
 """
 import os
+import hashlib
+import concurrent.futures
 import datetime as dt
 import numpy as np
 import xarray as xr
@@ -37,22 +41,29 @@ def _main(cfg_file):
     coords = _get_coords()
     filenames, filetimes = _get_files()
     src_cart, itp, data_cart, src = None, None, {}, {}
-    trg_cart, _ = _get_target_cart(coords[0], coords[1], cfg)
+    trg_cart = _get_target_cart(coords[0], coords[1], cfg)
     for i, _ in enumerate(filenames):
         if _check_output_exists(cfg, filetimes[i]):
             continue
         print(filenames[i])
         ds_data = _load_data(filenames[i], cfg['source'])
         ds_data = _smooth_kdp(ds_data, cfg)
+        src_old = src
         src, src_cart, data_cart = _get_src_coords(cfg, data_cart, ds_data, src, src_cart)
-        data_itp, itp = _data_to_grid(src, data_cart, trg_cart, itp)
-        _save(data_itp, cfg, coords, filetimes[i])
 
         # The DWD source coordinates are not constant, because the scans can start at slightly
-        # different elevation/azimuth angles. This is why the interpolation must be done from
+        # different elevation/azimuth angles. If they changed, the interpolation must be done from
         # scratch --> Put mapping information (itp) to None
-        if cfg['source'] == "DWD":
+        if cfg['source'] == "DWD" and not _same_coords(src, src_old):
             itp = None
+        data_itp, itp = _data_to_grid(src, data_cart, trg_cart, itp)
+        _save(data_itp, cfg, coords, filetimes[i])
+
+
+def _same_coords(src, src_old):
+    if src.keys() != src_old.keys():
+        return False
+    return all(np.array_equal(src[var], src_old[var]) for var in src)
 
 
 def _smooth_kdp(ds_data, cfg):
@@ -108,8 +119,7 @@ def _running_mean(kdp, size):
 def _get_coords():
     with open("wrf_file.txt", "r", encoding="utf-8") as file_handle:
         file_path = file_handle.readlines()[0]
-    grid_ds = handles.load_wrf_data(file_path.strip())
-    return grid_ds['XLONG'][0].values, grid_ds['XLAT'][0].values
+    return handles.load_wrf_grid(file_path.strip())
 
 
 def _get_files():
@@ -121,10 +131,25 @@ def _get_files():
 
 
 def _get_target_cart(lons, lats, cfg):
+    # The target grid only depends on the lon/lat grid, the heights and the radar site. It is
+    # cached in the working directory, so that it is only projected once for all jobs. The cache
+    # outlives the job folders, files of old grids or sites are never removed automatically.
     heights = _get_heights(cfg)
+    site = cfg['sites'][cfg['radar']]
+    key = hashlib.sha1(lons.tobytes() + lats.tobytes() + heights.tobytes()
+                       + str(list(site)).encode()).hexdigest()
+    cache_file = cfg['rg']['workdir'] + os.sep + "trg_cart_" + key + ".npy"
+    if os.path.exists(cache_file):
+        return np.load(cache_file, mmap_mode="r")
     trg_geo = _create_trg_grid(lons, lats, heights)
-    trg_cart, trg_proj = projection.geo_to_cart(trg_geo, origin=cfg['sites'][cfg['radar']])
-    return trg_cart, trg_proj
+    trg_cart, _ = projection.geo_to_cart(trg_geo, origin=site)
+
+    # Write to a temporary file first, other jobs might read the cache at the same time
+    tmp_file = cache_file + "." + str(os.getpid())
+    with open(tmp_file, "wb") as file_handle:
+        np.save(file_handle, trg_cart)
+    os.replace(tmp_file, cache_file)
+    return trg_cart
 
 
 def _get_heights(cfg):
@@ -134,18 +159,17 @@ def _get_heights(cfg):
 
 
 def _create_trg_grid(lons, lats, heights):
-    coords = np.concatenate((lons[..., np.newaxis], lats[..., np.newaxis]), axis=-1)
+    # Broadcasting writes the coordinates directly into the grid without tiled copies
     grid = np.empty((len(heights), len(lons), len(lons[0]), 3))
-    grid[:, :, :, :2] = np.tile(coords, (len(heights), 1, 1, 1))
-    heights_new = np.repeat(heights[:, np.newaxis, np.newaxis], len(lons), axis=1)
-    heights_new = np.repeat(heights_new, len(lons[0]), axis=2)
-    grid[:, :, :, 2] = heights_new
+    grid[:, :, :, 0] = lons[np.newaxis, :, :]
+    grid[:, :, :, 1] = lats[np.newaxis, :, :]
+    grid[:, :, :, 2] = heights[:, np.newaxis, np.newaxis]
     return grid
 
 
 def _check_output_exists(cfg, filetime):
     time = _get_time(filetime)
-    output_file = _make_folder(cfg, time)
+    output_file = _get_output_file(cfg, time)
     if os.path.exists(output_file):
         return True
     return False
@@ -157,7 +181,7 @@ def _get_time(filetime):
     return time
 
 
-def _make_folder(cfg, time):
+def _get_output_file(cfg, time):
     date = time.date()
     time_str = dt.datetime.strftime(time, "%H%M%S")
     if cfg['source'] == "DWD":
@@ -170,8 +194,7 @@ def _make_folder(cfg, time):
                              "parameter")
     output_folder = output_folder + os.sep + str(date.year) + os.sep + f"{date.month:02d}" \
         + os.sep + f"{date.day:02d}" + os.sep
-    output_folder = utils.make_folder(output_folder)
-    filename = output_folder + time_str + ".nc"
+    filename = os.path.normpath(output_folder) + os.sep + time_str + ".nc"
     return filename
 
 
@@ -214,63 +237,75 @@ def _get_variables(source):
 
 
 def _get_dwd_src_coords(ds_dict, variables):
+    # The variables of one scan usually have the same bins. The Cartesian coordinates of each sweep
+    # are therefore calculated only once, and variables with the same bins at all elevations share
+    # the same coordinate array.
     data_dict = {}
     xyz_dict = {}
+    sweep_xyz = {}
+    var_xyz = {}
     for var, var_ds in ds_dict.items():
         if var not in variables:
             continue
-        xyz, data = np.array([]).reshape((-1, 3)), np.array([])
+        # The elevations can have different numbers of bins, so the arrays of all elevations are
+        # collected and concatenated once at the end
+        keys, data = [], []
         for _, array in var_ds.items():
-            r_mesh, az_mesh = np.meshgrid(array.range.values, array.azimuth.values)
-            elv = np.full(r_mesh.shape, array.elevation)
-            xyz_, _ = projection.spherical_to_cart(r_mesh, az_mesh, elv, ds_dict['site_coords'])
-            xyz = np.vstack((xyz, xyz_.reshape((-1, 3))))
-            data = np.append(data, array.values.ravel())
-        data_dict[var] = data
-        xyz_dict[var] = xyz
+            key = (float(array.elevation), array.range.values.tobytes(),
+                   array.azimuth.values.tobytes())
+            if key not in sweep_xyz:
+                r_mesh, az_mesh = np.meshgrid(array.range.values, array.azimuth.values)
+                elv = np.full(r_mesh.shape, array.elevation)
+                xyz_, _ = projection.spherical_to_cart(r_mesh, az_mesh, elv,
+                                                       ds_dict['site_coords'])
+                sweep_xyz[key] = xyz_.reshape((-1, 3))
+            keys.append(key)
+            data.append(array.values.ravel())
+        keys = tuple(keys)
+        if keys not in var_xyz:
+            xyz = np.concatenate([sweep_xyz[key] for key in keys])
+            var_xyz[keys] = xyz.astype(float, copy=False)
+        data_dict[var] = np.concatenate(data).astype(float, copy=False)
+        xyz_dict[var] = var_xyz[keys]
     return xyz_dict, data_dict
 
 
 def _get_rf_src_coords(ds_rf, site, var, xyz=None):
-    data = np.array([])
-
-    # If source coordinates are given, just fill the data arrays with
-    # corresponding data
-    if xyz is not None:
-        for ele in ds_rf['elev'].values:
-            array = ds_rf[var].loc[(dict(elev=ele))]
-            data = np.append(data, array.values.ravel())
-
-    # If not, calculate the Cartesian source coordinates and stack them to
-    # one source coordinates array. Get the corresponding data points and
-    # return it in an array of the same format.
-    else:
-        xyz = np.array([]).reshape((-1, 3))
-        for ele in ds_rf['elev'].values:  # Do this for each elevation
-            array = ds_rf.loc[(dict(elev=ele))]
-            r_coord = array.range.values
-            az_coord = array.azim.values
-            r_mesh, az_mesh = np.meshgrid(r_coord, az_coord)  # Calculations need a mesh
-            elv = np.full(r_mesh.shape, array.elev)
-            xyz_, _ = projection.spherical_to_cart(r_mesh, az_mesh, elv, site)
-            xyz = np.vstack((xyz, xyz_.reshape((-1, 3))))
-            data = np.append(data, array[var].values.ravel())
+    # The radar filter data has the same range and azimuth coordinates at each elevation. The data
+    # and (if not given) the Cartesian source coordinates are therefore calculated for all
+    # elevations at once, ordered by elevation, azimuth and range.
+    data = np.ravel(ds_rf[var].transpose("elev", "azim", "range").values).astype(float, copy=False)
+    if xyz is None:
+        elv_mesh, az_mesh, r_mesh = np.meshgrid(ds_rf['elev'].values, ds_rf['azim'].values,
+                                                ds_rf['range'].values, indexing="ij")
+        xyz, _ = projection.spherical_to_cart(r_mesh, az_mesh, elv_mesh, site)
+        xyz = xyz.reshape((-1, 3))
     return xyz, data
 
 
 def _data_to_grid(src, data_cart, trg_cart, itp):
+    # The mapping (itp) is built with the first variable if it is not given yet and is then only
+    # read by all other variables. Their interpolation is therefore done in threads.
+    trg = trg_cart.reshape((-1, 3))
+    variables = list(src.keys())
     data = {}
-    for var in src.keys():
-        data_int, itp = projection.data_to_cart(data_cart[var], src[var], trg_cart.reshape((-1, 3)),
-                                                itp=itp)
-        data[var] = data_int.reshape(trg_cart.shape[:-1])
+    if itp is None:
+        data[variables[0]], itp = projection.data_to_cart(data_cart[variables[0]],
+                                                          src[variables[0]], trg)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(variables)) as executor:
+        futures = {var: executor.submit(projection.data_to_cart, data_cart[var], src[var], trg,
+                                         itp=itp) for var in variables if var not in data}
+    for var, future in futures.items():
+        data[var] = future.result()[0]
+    data = {var: data[var].reshape(trg_cart.shape[:-1]) for var in variables}
     return data, itp
 
 
 def _save(ds_rg, cfg, coords, filetime):
     heights = _get_heights(cfg)
     time = _get_time(filetime)
-    output = _make_folder(cfg, time)
+    output = _get_output_file(cfg, time)
+    utils.make_folder(os.path.dirname(output))
     time_str = str(dt.datetime.strptime(str(time), "%Y-%m-%d %H:%M:%S"))
     data_dict = {}
     for var, var_data in ds_rg.items():
@@ -292,7 +327,14 @@ def _save(ds_rg, cfg, coords, filetime):
     ds_rg.attrs['kdp_average_length'] = KDP_SMOOTH
     if cfg['mp'] is not None:
         ds_rg.attrs['MP_PHYSICS'] = cfg['mp']
+    # The radar variables are stored in single precision, which is more than the precision of the
+    # radar data. Coordinates keep double precision. Each height level is one chunk, that is
+    # compressed with the fastest zlib level.
     encoding = {k: {'zlib': True, 'fletcher32': True} for k in ds_rg.variables}
+    for var in ds_rg.data_vars:
+        encoding[var]['dtype'] = "float32"
+        encoding[var]['complevel'] = 1
+        encoding[var]['chunksizes'] = (1,) + ds_rg[var].shape[1:]
     ds_rg.to_netcdf(output, encoding=encoding)
 
 
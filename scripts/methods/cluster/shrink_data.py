@@ -12,12 +12,10 @@ data_path/MP?/radar_name/YYYY/MM/DD/
 with YYYY, MM, DD the year, month and day respectively and ? the WRF ID of the MP scheme (which can
 be single or double-digit).
 
-This script needs command line arguments:
-    1) WRF ID of microphysics scheme.
-    2) Radar name.
-    3) Hydrometeor class name.
-    4) Start time of data to be shrinked. (YYYY-mm-dd_HHMMSS)
-    5) End time of data to be shrinked. (YYYY-mm-dd_HHMMSS)
+The script is designed to work within a slurm array job. Each index of the array job corresponds to
+one hydrometeor class, the hydrometeor class names are listed in the file 'hms.txt' in the working
+directory. The files of the hydrometeor class are shrunk in parallel, using as many processes as
+tasks are reserved for the job.
 
 The configuration file is only used to load the data_paths to CR-SIM data and the mask. These
 settings should not be changed when sending jobs to the cluster, otherwise it could happen that the
@@ -25,15 +23,26 @@ configs are overwritten by changes before the job is started on the cluster.
 
 """
 import os
-import sys
+import concurrent.futures
 import datetime as dt
+import dask
 import numpy as np
 import xarray as xr
 
-from icepolcka_utils import utils
+from icepolcka_utils import cluster, utils
 
 CONFIG_FILE = "job_config.yaml"
 
+# Variables that are not read from the CR-SIM output. Not all of them exist in every file.
+_DROP_VARS = ("model_lwp", "mwr_lwp", "number_of_gridpoints_mwrlwp", "temp", "rho_d", "u", "v",
+              "w")
+_DROP_ATTRS = frozenset({
+    "description", "model_version", "WRF_input_file", "x_indices_of_WRF_extracted_scene",
+    "y_indices_of_WRF_extracted_scene", "z_indices_of_WRF_extracted_scene",
+    "scene_extracted_at_time_step", "x_and_y_indices_of_radar_position", "height_of_radar",
+    "scanning_mode", "created_by", "institute", "websites", "radar_frequency"
+    })
+
 
 def _get_hm(data_file):
     """Get hydrometeor name
@@ -84,32 +93,20 @@ def _sanity(data, radar):
 
 
 def _drop(data):
-    """Drop unnecessary variables
+    """Drop unnecessary attributes
 
-    This function drops variables and attributes that are not needed.
+    This function drops attributes that are not needed. The unnecessary variables are already
+    skipped when opening the file.
 
     Args:
         data (xarray.core.dataset.Dataset): CR-SIM dataset.
 
     Returns:
         xarray.core.dataset.Dataset:
-            CR-SIM dataset without unnecessary variables.
+            CR-SIM dataset without unnecessary attributes.
 
     """
-    if "mwr_lwp" in data:
-        data = data.drop_vars(["model_lwp", "mwr_lwp", "number_of_gridpoints_mwrlwp"])
-    if "temp" in data:
-        data = data.drop_vars(["temp", "rho_d", "u", "v", "w"])
-    del (data.attrs['description'], data.attrs['model_version'],
-         data.attrs['WRF_input_file'],
-         data.attrs['x_indices_of_WRF_extracted_scene'],
-         data.attrs['y_indices_of_WRF_extracted_scene'],
-         data.attrs['z_indices_of_WRF_extracted_scene'],
-         data.attrs['scene_extracted_at_time_step'],
-         data.attrs['x_and_y_indices_of_radar_position'],
-         data.attrs['height_of_radar'], data.attrs['scanning_mode'],
-         data.attrs['created_by'], data.attrs['institute'], data.attrs['websites'],
-         data.attrs['radar_frequency'])
+    data.attrs = {k: v for k, v in data.attrs.items() if k not in _DROP_ATTRS}
     return data
 
 
@@ -130,13 +127,13 @@ def _mask_data(data, mask, z_max):
     """
     variables = ["Zvv", "Zvh", "Zdr", "LDRh", "RHOhv", "DV", "SWh", "SWt", "SWs", "SWv", "SWtot",
                  "DV90", "SWh90", "RWV", "Kdp", "Av", "diff_back_phase", "wcont"]
-    for var in variables:
-        data[var].values = np.where(~mask, data[var].values, np.nan)
-        data[var].values = np.where(data['height'].values < z_max, data[var].values, np.nan)
+    height_keep = data['height'] < z_max
+    combined_keep = height_keep & xr.DataArray(~mask, dims=data['height'].dims[-mask.ndim:])
     if "Zmin" in data:
-        data['Zmin'].values = np.where(~mask, data['Zmin'].values, np.nan)
-        data['Zmin'].values = np.where(data['height'].values < z_max, data['Zmin'].values, np.nan)
-    data['Zhh'].values = np.where(data['height'].values < z_max, data['Zhh'].values, np.nan)
+        variables = variables + ["Zmin"]
+    for var in variables:
+        data[var] = data[var].where(combined_keep)
+    data['Zhh'] = data['Zhh'].where(height_keep)
 
     # Add all variables to the new data set and cut all heights >= 30
     data = data.set_coords(["xlong", "xlat"])
@@ -144,15 +141,11 @@ def _mask_data(data, mask, z_max):
     ds_new = xr.Dataset(coords={'lon': data['lon'], 'lat': data['lat']})
     for k in data.variables:
         if "nz" in data[k].dims:  # Cut only variables that have a height
-            ds_new[k] = data[k].where(data[k].nz < 29, drop=True)
+            ds_new[k] = data[k].isel(nz=slice(0, 29))
         else:
             ds_new[k] = data[k]
 
-    # Add attributes
-    for attr in data.attrs:
-        ds_new.attrs[attr] = data.attrs[attr]
-    ds_new.load()  # Load the new data set before closing the old one
-    data.close()
+    ds_new.attrs = dict(data.attrs)
     return ds_new
 
 
@@ -160,7 +153,8 @@ def _save(data, cfg, time, hm_name, output):
     """Save data to netcdf file
 
     Saves the data set after transposing the dimensions. This is necessary for applying the radar
-    filter in the following method step which needs a very specific order of the dimensions.
+    filter in the following method step which needs a very specific order of the dimensions. The
+    data set may be lazy, it is then read, masked and written chunk by chunk.
 
     Args:
         data (xarray.core.dataset.Dataset): Dataset to be saved.
@@ -175,11 +169,33 @@ def _save(data, cfg, time, hm_name, output):
     data.attrs['MP_PHYSICS'] = cfg['mp']
     data.attrs['hydrometeor'] = hm_name
     data['time'] = time
-    encoding = {k: {'zlib': True, 'fletcher32': True, '_FillValue': -9999} for k in data.variables}
+    encoding = {k: {'zlib': True, 'complevel': 1, 'fletcher32': True, '_FillValue': -9999}
+                for k in data.variables}
+    for k in data.variables:
+        # One height level per chunk, matching the height-wise chunks the data is written in
+        if "nz" in data[k].dims:
+            encoding[k]['chunksizes'] = tuple(1 if dim in ("one", "nz") else data.sizes[dim]
+                                              for dim in data[k].dims)
     data.to_netcdf(output, encoding=encoding)
 
 
-def _main(cfg_file, hm_name):
+def _init_worker():
+    # The files are already shrunk in parallel, so each worker reads its chunks in a single thread
+    dask.config.set(scheduler="synchronous")
+
+
+def _shrink_file(cfg, mask, input_file, output_file, time, hm_name):
+    print(input_file)
+
+    # Open the data in chunks along the height, so that only one chunk is in memory at a time
+    with xr.open_dataset(input_file, chunks={'nz': 16}, drop_variables=_DROP_VARS) as data:
+        _sanity(data, cfg['radar'])
+        data = _drop(data)
+        data = _mask_data(data, mask, cfg['cart_grid']['z_max'])
+        _save(data, cfg, time, hm_name, output_file)
+
+
+def _main(cfg_file, hm_name, workers):
     print("Starting main")
     cfg = utils.get_cfg(cfg_file)
     mask = np.load(cfg['masks']['Distance'])
@@ -190,26 +206,33 @@ def _main(cfg_file, hm_name):
         + os.sep + str(date.year) + os.sep + f"{date.month:02d}" + os.sep + f"{date.day:02d}" \
         + os.sep
 
+    # File names start with HHMMSS, so the time range can be checked on the strings directly
+    start_str = cfg['start'].strftime("%H%M%S")
+    end_str = cfg['end'].strftime("%H%M%S")
+    output_path = utils.make_folder(cfg['data']['CRSIM'], cfg['mp'], cfg['radar'], date,
+                                    hm_name=hm_name)
+
+    # The files are independent of each other, each one is shrunk in its own process
     print("Running shrink for each data file")
-    for data_file in sorted(os.listdir(data_path)):
-        file_hm = _get_hm(data_file)
-        time_str = data_file[:6]
-        time = dt.datetime.strptime(str(date) + time_str, "%Y-%m-%d%H%M%S")
-        if not cfg['start'] <= time <= cfg['end']:
-            continue
-        if hm_name != file_hm:
-            continue
-        print(data_file)
-        data = xr.open_dataset(data_path + data_file)
-        _sanity(data, cfg['radar'])
-        data = _drop(data)
-        data = _mask_data(data, mask, cfg['cart_grid']['z_max'])
-        output_file = utils.make_folder(cfg['data']['CRSIM'], cfg['mp'], cfg['radar'], date,
-                                        hm_name=hm_name)
-        output_file = output_file + time_str + ".nc"
-        _save(data, cfg, time, hm_name, output_file)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                initializer=_init_worker) as executor:
+        futures = []
+        for data_file in sorted(os.listdir(data_path)):
+            time_str = data_file[:6]
+            if not start_str <= time_str <= end_str:
+                continue
+            if hm_name != _get_hm(data_file):
+                continue
+            output_file = output_path + time_str + ".nc"
+            if os.path.exists(output_file):
+                continue
+            time = dt.datetime.strptime(str(date) + time_str, "%Y-%m-%d%H%M%S")
+            futures.append(executor.submit(_shrink_file, cfg, mask, data_path + data_file,
+                                           output_file, time, hm_name))
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
 
 
 if __name__ == "__main__":
-    hm_input = sys.argv[1]
-    _main(CONFIG_FILE, hm_input)
+    hm_input = cluster.SlurmJob.get_files(["hms.txt"], int(os.environ['SLURM_ARRAY_TASK_ID']))[0]
+    _main(CONFIG_FILE, hm_input, int(os.environ.get('SLURM_NTASKS', 1)))
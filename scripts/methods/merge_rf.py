@@ -37,7 +37,11 @@ In the configuration file, the following information must be given:
 
 """
 import os
+import itertools
+import concurrent.futures
 import datetime as dt
+import dask
+import numba
 import numpy as np
 import xarray as xr
 
@@ -45,6 +49,10 @@ from icepolcka_utils import utils
 
 CONFIG_FILE = "/home/g/Gregor.Koecher/.config/icepolcka/paper2.yaml"
 
+# Number of time steps that are merged at the same time. Each worker holds one full time step in
+# memory, and the script usually runs on an interactive node.
+MAX_WORKERS = 4
+
 
 def _group_variables(data_path):
     """Group variables
@@ -61,20 +69,20 @@ def _group_variables(data_path):
 
     """
     print("Grouping variables")
-    file_dict = {}
-    for data_file in sorted(os.listdir(data_path)):
-        time_str = data_file[:6]
-        if time_str not in file_dict.keys():
-            file_dict[time_str] = [data_file]
-        else:
-            file_dict[time_str].append(data_file)
+    data_files = sorted(entry.name for entry in os.scandir(data_path) if entry.is_file())
+    file_dict = {time_str: list(group) for time_str, group in
+                 itertools.groupby(data_files, key=lambda data_file: data_file[:6])}
     return file_dict
 
 
 def _open_datasets(data_path, file_list):
     """Open datasets for all variables
 
-    Opens the datasets for each individual variable and merge them into one big dataset.
+    Opens the datasets for each individual variable and merge them into one big dataset. The files
+    are opened one after another, the parallelism is over the time steps (see _main). Each file
+    contains exactly one of the radar variables, all other variables and coordinates are the same
+    in all files and are taken from the first file. Unused variables are dropped and the dimensions
+    are renamed to the final azim/elev/range layout before the data is loaded.
 
     Args:
         data_path (str): Path to the data directory.
@@ -86,11 +94,15 @@ def _open_datasets(data_path, file_list):
             Dataset that contains all variables.
 
     """
-    data = xr.open_dataset(data_path + file_list[0])
-    for file in file_list[1:]:
-        var = file[7:].split('.')[0]
-        ds_var = xr.open_dataset(data_path + file)
-        data[var] = ds_var[var]
+    paths = [data_path + file for file in file_list]
+    data = xr.open_mfdataset(paths, combine="by_coords", data_vars="minimal", coords="minimal",
+                             compat="override", join="override")
+
+    # Bring the data to the final layout before it is read, so that neither the unused variables
+    # are loaded nor the data is touched again later
+    data = data.drop_vars(["method", "np", "npc"])
+    data = data.swap_dims({'naz': "azim", 'nel': "elev", 'nr': "range"})
+    data.load()
     return data
 
 
@@ -109,16 +121,40 @@ def _get_corrected_refl(data):
             Data set with attenuation corrected variables 'Zhh_corr' and 'Zdr_corr'.
 
     """
-    res = (data['range'][1] - data['range'][0]).values
-    ah_cum = np.nancumsum(data['Ah'].values, axis=2)/1000*2*res
-    adp_cum = np.nancumsum(data['Adp'].values, axis=2)/1000*2*res
-    zhh_corr = data['Zhh'] - ah_cum
-    zdr_corr = data['Zdr'] - adp_cum
-    data['Zhh_corr'] = zhh_corr
-    data['Zdr_corr'] = zdr_corr
+    # Two-way attenuation [dB/km] per range bin [m], as a plain float for the numba kernel
+    r_coord = data['range'].values
+    factor = float(r_coord[1] - r_coord[0])*2/1000
+    a_h = np.ascontiguousarray(data['Ah'].values)
+    a_dp = np.ascontiguousarray(data['Adp'].values)
+    zhh = np.ascontiguousarray(data['Zhh'].values)
+    zdr = np.ascontiguousarray(data['Zdr'].values)
+    # The corrected fields keep the precision of the radar filter output, only the running sums of
+    # the kernel are accumulated in float64
+    zhh_corr = np.empty(zhh.shape, dtype=np.result_type(zhh, a_h, r_coord))
+    zdr_corr = np.empty(zdr.shape, dtype=np.result_type(zdr, a_dp, r_coord))
+    _correct_attenuation(a_h, a_dp, zhh, zdr, factor, zhh_corr, zdr_corr)
+    data['Zhh_corr'] = (data['Zhh'].dims, zhh_corr)
+    data['Zdr_corr'] = (data['Zdr'].dims, zdr_corr)
     return data
 
 
+@numba.njit(parallel=True, cache=True)
+def _correct_attenuation(a_h, a_dp, zhh, zdr, factor, zhh_corr, zdr_corr):
+    # Two-way attenuation is accumulated along the range axis (last axis) and subtracted in the same
+    # pass. NaN values do not contribute to the accumulated attenuation (as in numpy.nancumsum).
+    for i in numba.prange(zhh.shape[0]):
+        for j in range(zhh.shape[1]):
+            sum_ah = 0.0
+            sum_adp = 0.0
+            for k in range(zhh.shape[2]):
+                if not np.isnan(a_h[i, j, k]):
+                    sum_ah += a_h[i, j, k]
+                if not np.isnan(a_dp[i, j, k]):
+                    sum_adp += a_dp[i, j, k]
+                zhh_corr[i, j, k] = zhh[i, j, k] - sum_ah*factor
+                zdr_corr[i, j, k] = zdr[i, j, k] - sum_adp*factor
+
+
 def _save(data, time, mp_id, radar, output):
     """Save data to netcdf file
 
@@ -133,10 +169,39 @@ def _save(data, time, mp_id, radar, output):
     data['time'] = time
     data.attrs['MP_PHYSICS'] = mp_id
     data.attrs['radar'] = radar
-    encoding = {k: {'zlib': True, 'fletcher32': True} for k in data.variables}
+    encoding = {k: {'zlib': True, 'complevel': 1, 'fletcher32': True} for k in data.variables}
     data.to_netcdf(output, encoding=encoding)
 
 
+def _init_worker():
+    # The time steps are already processed in parallel, so each worker uses a single thread
+    numba.set_num_threads(1)
+    dask.config.set(scheduler="synchronous")
+
+
+def _process_timestep(cfg, data_path, output_path, date, time_str, file_list):
+    """Merge all variables of one time step
+
+    Opens the files of all variables of the time step, adds the attenuation corrected variables
+    and saves the merged data set.
+
+    Args:
+        cfg (dict): Configuration dictionary.
+        data_path (str): Path to the data directory.
+        output_path (str): Path to the output directory.
+        date (datetime.date): Date of the data.
+        time_str (str): Time of the time step (HHMMSS).
+        file_list (list): List of files of the time step containing the files of all variables.
+
+    """
+    time = dt.datetime.strptime(str(date) + time_str, "%Y-%m-%d%H%M%S")
+    print(time)
+    data = _open_datasets(data_path, file_list)
+    data = _get_corrected_refl(data)
+    output_file = output_path + time_str + ".nc"
+    _save(data, time, cfg['mp'], cfg['radar'], output_file)
+
+
 def _main(cfg_file):
     cfg = utils.get_cfg(cfg_file)
     assert cfg['start'].date() == cfg['end'].date(), "Time cannot exceed 1 day"
@@ -145,20 +210,24 @@ def _main(cfg_file):
         + cfg['radar'] + os.sep + str(date.year) + os.sep + f"{date.month:02d}"\
         + os.sep + f"{date.day:02d}" + os.sep
     file_dict = _group_variables(data_path)
+    output_path = utils.make_folder(cfg['data']['RF'], cfg['mp'], cfg['radar'], date)
+
+    # File names start with HHMMSS, so the time range can be checked on the strings directly
+    start_str = cfg['start'].strftime("%H%M%S")
+    end_str = cfg['end'].strftime("%H%M%S")
 
+    # Each time step is written to its own file, so the time steps are processed in parallel
     print("Merging variables")
-    for time_str, file_list in file_dict.items():
-        time = dt.datetime.strptime(str(date) + time_str, "%Y-%m-%d%H%M%S")
-        if not cfg['start'] <= time <= cfg['end']:
-            continue
-        print(time)
-        data = _open_datasets(data_path, file_list)
-        data = _get_corrected_refl(data)
-        data = data.drop_vars(["method", "np", "npc"])
-        data = data.swap_dims({'naz': "azim", 'nel': "elev", 'nr': "range"})
-        output_file = utils.make_folder(cfg['data']['RF'], cfg['mp'], cfg['radar'], date)
-        output_file = output_file + time_str + ".nc"
-        _save(data, time, cfg['mp'], cfg['radar'], output_file)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=MAX_WORKERS,
+                                                initializer=_init_worker) as executor:
+        futures = []
+        for time_str, file_list in file_dict.items():
+            if not start_str <= time_str <= end_str:
+                continue
+            futures.append(executor.submit(_process_timestep, cfg, data_path, output_path, date,
+                                           time_str, file_list))
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
 
 
 if __name__ == "__main__":
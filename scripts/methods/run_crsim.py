@@ -41,7 +41,6 @@ In the configuration file, the following information must be given:
 
 """
 import os
-import subprocess
 import datetime as dt
 
 from icepolcka_utils.database import models
@@ -49,6 +48,16 @@ from icepolcka_utils import cluster, utils
 
 CONFIG_FILE = "/home/g/Gregor.Koecher/.config/icepolcka/paper2.yaml"
 
+# Cluster resources (threads, time limit, ram) for each MP scheme ID. SBM (30) and P3 (50) only work
+# with threads = 1.
+MP_RESOURCES = {
+    8: (8, "03:00:00", "22G"),  # Thompson
+    10: (8, "03:00:00", "8G"),  # Morrison
+    28: (8, "03:00:00", "22G"),  # Thompson aerosol aware
+    30: (1, "03:00:00", "11G"),  # Spectral Bin
+    50: (1, "66:00:00", "10G"),  # P3
+    }
+
 
 def _set_cluster_res(mp_id, cloud_handle, wrfmp_handle, model_time):
     """Set cluster resources
@@ -74,46 +83,21 @@ def _set_cluster_res(mp_id, cloud_handle, wrfmp_handle, model_time):
             4) WRF input line for the CR-SIM simulation.
 
     """
-    clouds_file = cloud_handle['file_path']
-    wrfinput = clouds_file
-    time = "03:00:00"
-    threads = 8
-
-    # Set resources for Thompson scheme
-    if mp_id == 8:
-        ram = "22G"
-
-    # Set resources for Morrison scheme
-    elif mp_id == 10:
-        ram = "8G"
-
-    # Set resources for Thompson aerosol aware scheme
-    elif mp_id == 28:
-        ram = "22G"
-
-    # Set resources for Spectral Bin Scheme
-    elif mp_id == 30:
-        threads = 1  # SBM works only with threads = 1
-        ram = "11G"
-
-        # SBM needs a wrfmp file next to the wrfout file. Check that this file has the correct time
-        # stamp corresponding to the wrfout file.
-        wrfmp_file = wrfmp_handle['file_path']
-        assert model_time == wrfmp_handle['start_time'], "Couldn't find corresponding wrfmp file"
-        wrfinput = clouds_file + "," + wrfmp_file
-
-    # Set resources for P3 scheme
-    elif mp_id == 50:
-        threads = 1  # P3 only works with threads = 1
-        time = "66:00:00"
-        ram = "10G"
-    else:
+    if mp_id not in MP_RESOURCES:
         raise AssertionError("MP scheme ID not known. Possible are: 8, 10, 28, 30, 50")
+    threads, time, ram = MP_RESOURCES[mp_id]
+    wrfinput = cloud_handle['file_path']
+
+    # SBM needs a wrfmp file next to the wrfout file. Check that this file has the correct time
+    # stamp corresponding to the wrfout file.
+    if mp_id == 30:
+        assert model_time == wrfmp_handle['start_time'], "Couldn't find corresponding wrfmp file"
+        wrfinput = wrfinput + "," + wrfmp_handle['file_path']
 
     return threads, time, ram, wrfinput
 
 
-def _run_job(cfg, cfg_file, cloud_handle, wrfmp_handle):
+def _prepare_job(cfg, cfg_file, cloud_handle, wrfmp_handle):
     model_time = cloud_handle['start_time']
     threads, time, ram, wrfinput = _set_cluster_res(cfg['mp'], cloud_handle, wrfmp_handle,
                                                     model_time)
@@ -121,12 +105,14 @@ def _run_job(cfg, cfg_file, cloud_handle, wrfmp_handle):
         os.sep + "PARAMETERS"
     output_file = _make_output_folder(cfg, cloud_handle)
     if os.path.exists(output_file):
-        return
-    job_name = "crsim_" + cfg['radar']
+        return None
+    # The jobs are sent together after all batch scripts are written, so each time step needs its
+    # own job folder
+    job_name = "crsim_" + cfg['radar'] + "_" + model_time.strftime("%Y%m%d_%H%M%S")
     job = cluster.SlurmJob(cfg, "crsim", job_name, mem=ram, time=time, exe='', threads=threads,
                            script=cfg['crsim']['exe'])
     batch_path = job.prepare_job(cfg_file, job_params, wrfinput, output_file)
-    subprocess.run(["sbatch", batch_path], check=True)
+    return batch_path
 
 
 def _make_output_folder(cfg, handle):
@@ -145,10 +131,14 @@ def _main(cfg_file):
 
     print("Sending CR-SIM job for each time step")
     wrfmp_handle = None
+    job_args = []
     for i, cloud_handle in enumerate(cloud_handles):
         if cfg['mp'] == 30:
             wrfmp_handle = wrfmp_handles[i]
-        _run_job(cfg, cfg_file, cloud_handle, wrfmp_handle)
+        batch_path = _prepare_job(cfg, cfg_file, cloud_handle, wrfmp_handle)
+        if batch_path is not None:
+            job_args.append([batch_path])
+    cluster.submit_jobs(job_args)
 
 
 if __name__ == "__main__":
@@ -51,6 +51,9 @@ from icepolcka_utils import cluster, utils
 
 CONFIG_FILE = "/home/g/Gregor.Koecher/.config/icepolcka/paper2.yaml"
 
+# Maximum number of simultaneously running array tasks (limits the load on the file system)
+MAX_ARRAY_TASKS = 16
+
 
 def _main(cfg_file):
     print("Starting main")
@@ -68,7 +71,7 @@ def _main(cfg_file):
                  'crsim_files.txt': [h['file_path'] for h in crsim_handles]}
     job.write_files(filenames)
     batch_path = job.prepare_job(cfg_file)
-    arg = "--array=0-" + str(len(wrf_handles) - 1)
+    arg = "--array=0-" + str(len(wrf_handles) - 1) + "%" + str(MAX_ARRAY_TASKS)
     subprocess.run(["sbatch", arg, batch_path], check=True)
 
 
@@ -61,6 +61,13 @@ from icepolcka_utils import cluster, utils
 
 CONFIG_FILE = "/home/g/Gregor.Koecher/.config/icepolcka/paper2.yaml"
 
+# Maximum number of array tasks running at the same time. All tasks read from and write to the same
+# directories on the shared file system, so running all of them at once slows down every task.
+MAX_ARRAY_TASKS = 16
+
+# Variables that are processed by the radar filter job. The job reads them from variables.txt.
+VARIABLES = ["Zhh", "Zdr", "LDRh", "RHOhv", "Kdp", "Ah", "Adp"]
+
 
 def _get_spherical_grid(spherical_grid, radar):
     """Get spherical grid
@@ -91,7 +98,8 @@ def _get_spherical_grid(spherical_grid, radar):
 def _prep_folder(job, rf_dir):
     """Prepare job folder
 
-    Prepares the job folder by copying the radar filter code to the working directory.
+    Prepares the job folder by linking the radar filter code to the working directory. Only the
+    parameter file is copied, because it is changed for each job.
 
     Args:
         job (SlurmJob): Cluster job object with information about the working directory.
@@ -104,19 +112,18 @@ def _prep_folder(job, rf_dir):
 
     """
     print("Preparing job folder")
-    rf_subfolder = job.job_folder + os.sep + "radar_filter" + os.sep
-    try:
-        shutil.copytree(rf_dir, rf_subfolder)
-    except FileExistsError:
-        pass
+    rf_subfolder = job.job_folder + os.sep + "radar_filter"
+    if not os.path.lexists(rf_subfolder):
+        os.symlink(os.path.abspath(rf_dir), rf_subfolder, target_is_directory=True)
     shutil.copy(rf_subfolder + os.sep + "RF_PARAMETERS", job.job_folder)
 
 
 def _write_files(handles, job):
-    """Write file names and times to txt files
+    """Write file names, times and variables to txt files
 
     Writes all file names and times to txt files, one line for each file or time. The cluster array
-    job will later access these files based on the job indices.
+    job will later access these files based on the job indices. The variables to be processed are
+    written to a txt file as well, one line for each variable.
 
     Args:
         handles (list): List of ResultHandles corresponding to CR-SIM data files.
@@ -126,7 +133,33 @@ def _write_files(handles, job):
     print("Writing files")
     file_names = [handle['file_path'] for handle in handles]
     file_times = [dt.datetime.strftime(handle['time'], "%Y-%m-%d_%H%M%S") for handle in handles]
-    job.write_files({"filenames.txt": file_names, "filetimes.txt": file_times})
+    job.write_files({"filenames.txt": file_names, "filetimes.txt": file_times,
+                     "variables.txt": VARIABLES})
+
+
+def _get_missing(handles, output_folder):
+    """Get handles with missing output
+
+    Radar filter output is written to one file per variable and time step. This function returns
+    only the handles of time steps, where the output of at least one variable is still missing.
+
+    Args:
+        handles (list): List of ResultHandles corresponding to CR-SIM data files.
+        output_folder (str): Path to the radar filter output folder.
+
+    Returns:
+        list:
+            List of ResultHandles that still need to be processed.
+
+    """
+    missing = []
+    for handle in handles:
+        time = handle['time']
+        output = output_folder + str(time.year) + os.sep + f"{time.month:02d}" + os.sep \
+            + f"{time.day:02d}" + os.sep + dt.datetime.strftime(time, "%H%M%S")
+        if not all(os.path.exists(output + "_" + var + ".nc") for var in VARIABLES):
+            missing.append(handle)
+    return missing
 
 
 def _set_params(job_folder, cfg, output):
@@ -169,15 +202,21 @@ def _run_job(cfg, cfg_file, handles):
         ram = "1G"
         time = "00:60:00"
 
+    # Time steps where the output exists already are not sent again
+    output_folder = utils.make_folder(cfg['data']['RFOut'], cfg['mp'], cfg['radar'])
+    handles = _get_missing(handles, output_folder)
+    if not handles:
+        print("Output exists already for all time steps")
+        return
+
     job_name = "rf_" + cfg['radar']
     job = cluster.SlurmJob(cfg, "rf", job_name, mem=ram, time=time, exe=cfg['exe'],
                            script=cfg['rf']['script'])
     _prep_folder(job, cfg['rf']['folder'])
     _write_files(handles, job)
-    output_folder = utils.make_folder(cfg['data']['RFOut'], cfg['mp'], cfg['radar'])
     _set_params(job.job_folder, cfg, output_folder)
     batch_path = job.prepare_job(cfg_file)
-    arg = "--array=0-" + str(len(handles) - 1)
+    arg = "--array=0-" + str(len(handles) - 1) + "%" + str(MAX_ARRAY_TASKS)
     subprocess.run(["sbatch", arg, batch_path], check=True)
 
 
@@ -73,14 +73,19 @@ def _get_hms(mp_id):
     return hms
 
 
-def _run_job(cfg, cfg_file, hm_name):
-    job_name = "shrink_" + cfg['radar'] + "_" + hm_name
-    ram = "2G"
+def _run_job(cfg, cfg_file, hms):
+    # All hydrometeor classes are shrinked in one array job, the array index corresponds to the
+    # line in the hms.txt file
+    job_name = "shrink_" + cfg['radar']
+    ram = "8G"
     time = "08:00:00"
+    threads = 4
     job = cluster.SlurmJob(cfg, "shrink", job_name, mem=ram, time=time, exe=cfg['exe'],
-                           script=cfg['shrink']['script'])
-    batch_path = job.prepare_job(cfg_file, hm_name)
-    subprocess.run(["sbatch", batch_path], check=True)
+                           threads=threads, script=cfg['shrink']['script'])
+    job.write_files({'hms.txt': hms})
+    batch_path = job.prepare_job(cfg_file)
+    arg = "--array=0-" + str(len(hms) - 1)
+    subprocess.run(["sbatch", arg, batch_path], check=True)
 
 
 def _main(cfg_file):
@@ -88,10 +93,8 @@ def _main(cfg_file):
     assert cfg['start'].date() == cfg['end'].date(), "Time cannot exceed 1 day"
 
     hms = _get_hms(cfg['mp'])
-    print("Sending job for each hydrometeor")
-    for hm_name in hms:
-        print(hm_name)
-        _run_job(cfg, cfg_file, hm_name)
+    print("Sending array job for all hydrometeors")
+    _run_job(cfg, cfg_file, hms)
 
 
 if __name__ == "__main__":
@@ -32,13 +32,14 @@ WRF_FILE = "/project/meteo/work/Gregor.Koecher/icepolcka/data/wrf/icepolcka/2019
            "/clouds_d03_2019-05-28_120000"
 
 
-def _get_coords(data):
+def _get_coords(lons, lats):
     """Get grid coordinates
 
     Gets the lon/lat grid coordinates of the WRF grid.
 
     Args:
-        data (xarray.core.dataset.Dataset): Dataset that contains the WRF grid.
+        lons (numpy.ndarray): Longitudes of the WRF grid.
+        lats (numpy.ndarray): Latitudes of the WRF grid.
 
     Returns:
         (numpy.ndarray, tuple):
@@ -47,9 +48,9 @@ def _get_coords(data):
 
     """
     print("Getting coordinates")
-    grid_shape = data['XLONG'][0].shape
-    lons = data['XLONG'][0].values.ravel()
-    lats = data['XLAT'][0].values.ravel()
+    grid_shape = lons.shape
+    lons = lons.ravel()
+    lats = lats.ravel()
     coords = np.concatenate((lons[:, np.newaxis], lats[:, np.newaxis]), axis=-1)
     return coords, grid_shape
 
@@ -72,24 +73,19 @@ def _get_mask(mira_coords, coords, r_max, grid_shape):
 
     """
     print("Getting mask")
-    dist = np.array([geo.get_target_distance(mira_coords[:2], c) for c in coords])
-    dist = dist.reshape(grid_shape)
-    mask = np.full(dist.shape, False)
-    idx = np.where(dist > r_max)
-    mask[idx] = True
+    dist = geo.get_target_distance(mira_coords[:2], (coords[:, 0], coords[:, 1]))
+    mask = dist.reshape(grid_shape) > r_max
     return mask
 
 
 def _main(cfg_file):
     print("Starting main")
     cfg = utils.get_cfg(cfg_file)
-    data = handles.load_wrf_data(WRF_FILE)
+    lons, lats = handles.load_wrf_grid(WRF_FILE)
     mira_coords = cfg['sites']['Mira35']
-    wrf_coords, grid_shape = _get_coords(data)
+    wrf_coords, grid_shape = _get_coords(lons, lats)
     crsim_mask = _get_mask(mira_coords, wrf_coords, cfg['max_r'], grid_shape)
-    mask_folder_split = cfg['masks']['Distance'].split(os.sep)[:-1]
-    mask_folder = os.sep.join(mask_folder_split)
-    utils.make_folder(mask_folder)
+    utils.make_folder(os.path.dirname(cfg['masks']['Distance']))
     np.save(cfg['masks']['Distance'], crsim_mask)
 
 
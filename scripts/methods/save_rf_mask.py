@@ -36,10 +36,8 @@ RG_FILE = "/project/meteo/work/Gregor.Koecher/icepolcka/data/rg/MODEL/MP8/Isen/2
 def _main():
     cfg = utils.get_cfg(CONFIG_FILE)
     data = handles.load_xarray(RG_FILE)
-    mask = np.isnan(data['Zdr'].values[16])
-    mask_folder_split = cfg['masks']['RF'].split(os.sep)[:-1]
-    mask_folder = os.sep.join(mask_folder_split)
-    utils.make_folder(mask_folder)
+    mask = np.isnan(data['Zdr'][16].values)
+    utils.make_folder(os.path.dirname(cfg['masks']['RF']))
     np.save(cfg['masks']['RF'], mask)
 
 